@@ -6,59 +6,197 @@ Converts various document formats to PDF using Python libraries.
 Supports: docx, doc, pptx, ppt, xlsx, xls, txt, csv, rtf, html, md
 """
 
+import io
 import os
+import re
 import sys
 import argparse
+import functools
+import importlib.util
+import multiprocessing as mp
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
 from typing import List, Dict, Set
+from xml.sax.saxutils import escape as _xml_escape
 import logging
 
-# Document conversion libraries
-try:
+# Document conversion libraries are imported on first use so a run only pays
+# the import cost (seconds for pandas/weasyprint) of the formats it converts.
+# Each loader binds the module globals its converters use.
+
+def _load_docx2pdf():
+    global docx_to_pdf
     from docx2pdf import convert as docx_to_pdf
-    DOCX2PDF_AVAILABLE = True
-except ImportError:
-    DOCX2PDF_AVAILABLE = False
 
-try:
+def _load_pandas():
+    global pd
     import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
 
-try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-    from reportlab.lib.units import inch
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+def _load_reportlab():
+    global A4, SimpleDocTemplate, Paragraph, Spacer, LongTable
+    global _STYLES, _TITLE_STYLE, _CODE_STYLE, _NORMAL_STYLE, _H1_STYLE, _ITALIC_STYLE, _TABLE_STYLE
+    global _CELL_STYLE, _HEADER_CELL_STYLE
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, LongTable, TableStyle
+    
+    # Build the sample style sheet once instead of once per converted document
+    _STYLES = getSampleStyleSheet()
+    _TITLE_STYLE = _STYLES['Title']
+    _CODE_STYLE = _STYLES['Code']
+    _NORMAL_STYLE = _STYLES['Normal']
+    _H1_STYLE = _STYLES['Heading1']
+    _ITALIC_STYLE = _STYLES['Italic']
+    _TABLE_STYLE = TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Courier'),
+        ('FONTSIZE', (0, 0), (-1, -1), TABLE_FONT_SIZE),
+        ('FONTNAME', (0, 0), (-1, 0), 'Courier-Bold'),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ])
+    # Cells too long for their column are wrapped as paragraphs, breaking long words anywhere
+    _CELL_STYLE = ParagraphStyle('TableCell', fontName='Courier', fontSize=TABLE_FONT_SIZE,
+                                 leading=TABLE_FONT_SIZE * 1.2, wordWrap='CJK')
+    _HEADER_CELL_STYLE = ParagraphStyle('TableHeader', parent=_CELL_STYLE, fontName='Courier-Bold')
 
-try:
+def _load_pptx():
+    global Presentation
     from pptx import Presentation
-    PPTX_AVAILABLE = True
-except ImportError:
-    PPTX_AVAILABLE = False
 
-try:
+def _load_markdown():
+    global markdown
     import markdown
+
+def _load_weasyprint():
+    global HTML, _WP_FONT_CONFIG, _MD_CSS
     from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-    MARKDOWN_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
+    from weasyprint.text.fonts import FontConfiguration
+    
+    # Share one font configuration across conversions instead of re-initializing fontconfig
+    _WP_FONT_CONFIG = FontConfiguration()
+    # Stylesheet for rendered Markdown, parsed once
+    _MD_CSS = CSS(string="body{font-family:sans-serif;font-size:11pt} pre{white-space:pre-wrap}",
+                  font_config=_WP_FONT_CONFIG)
+
+def _load_numba():
+    global np, _rtf_strip_nb
+    import numpy as np
+    from numba import njit
+    
+    # Only use the compiled scanner if it compiles and agrees with the regex fallback
+    sample = b"{\\rtf1\\ansi{\\fonttbl\\f0 Arial;}\\f0\\fs24 Hello {\\b bold}\\par\n\\u8364? \\'e9 \\\\ end}"
     try:
-        import markdown
-        MARKDOWN_AVAILABLE = True
-    except ImportError:
-        MARKDOWN_AVAILABLE = False
+        _rtf_strip_nb = njit("int64(uint8[:], uint8[:])", cache=True)(_rtf_strip_bytes)
+        data = np.frombuffer(bytearray(sample), dtype=np.uint8)
+        out = np.empty_like(data)
+        stripped = out[:_rtf_strip_nb(data, out)].tobytes().decode()
+    except Exception as e:
+        raise ImportError(f"numba could not compile the RTF scanner: {e}") from e
+    if stripped != _RTF_BRACE_RE.sub('', _RTF_CONTROL_RE.sub('', sample.decode())):
+        raise ImportError("numba RTF scanner does not match the regex fallback")
+
+_DEP_LOADERS = {
+    'docx2pdf': _load_docx2pdf,
+    'pandas': _load_pandas,
+    'reportlab': _load_reportlab,
+    'pptx': _load_pptx,
+    'markdown': _load_markdown,
+    'weasyprint': _load_weasyprint,
+    'numba': _load_numba,
+}
+
+# Install hints for missing dependencies
+_DEP_DESCRIPTIONS = {
+    'reportlab': "reportlab (for text/CSV conversion)",
+    'pandas': "pandas openpyxl (for Excel files)",
+    'docx2pdf': "docx2pdf (for Word files)",
+    'pptx': "python-pptx (for PowerPoint files)",
+    'weasyprint': "weasyprint (for HTML conversion)",
+    'markdown': "markdown (for Markdown files)",
+}
+
+# Top-level modules behind each dependency, for checking availability without importing
+_DEP_MODULES = {
+    'docx2pdf': ('docx2pdf',),
+    'pandas': ('pandas',),
+    'reportlab': ('reportlab',),
+    'pptx': ('pptx',),
+    'markdown': ('markdown',),
+    'weasyprint': ('weasyprint',),
+    'numba': ('numba', 'numpy'),
+}
+
+_deps: Dict[str, bool] = {}
+
+def _need(name: str) -> bool:
+    """Import an optional dependency on first use; returns whether it is available"""
+    if name not in _deps:
+        try:
+            _DEP_LOADERS[name]()
+            _deps[name] = True
+        except (ImportError, OSError):
+            # OSError: installed, but a native library is missing (Cairo/Pango for weasyprint)
+            _deps[name] = False
+    return _deps[name]
+
+def _installed(name: str) -> bool:
+    """Check whether an optional dependency is installed, without the cost of importing it"""
+    return all(importlib.util.find_spec(module) is not None for module in _DEP_MODULES[name])
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Patterns used for RTF text extraction, compiled once
+_RTF_CONTROL_RE = re.compile(r'\\[a-z]+\d*\s?')
+_RTF_BRACE_RE = re.compile(r'[{}]')
+
+# Full HTML5 document wrapped around rendered Markdown fragments
+_MD_HTML_TEMPLATE = "<!DOCTYPE html><html><head><meta charset='utf-8'></head><body>{body}</body></html>"
+
+# RTF files larger than this are stripped with the native scanner when available
+NUMBA_RTF_MIN_BYTES = 64 * 1024
+
+def _rtf_strip_bytes(buf, out):
+    """Byte-level equivalent of _RTF_CONTROL_RE and _RTF_BRACE_RE; returns output length.
+    
+    Compiled with Numba as _rtf_strip_nb when numba is installed.
+    """
+    n = buf.shape[0]
+    i = 0
+    j = 0
+    while i < n:
+        c = buf[i]
+        # Control word: backslash, lowercase letters, digits, optional whitespace
+        if c == 92 and i + 1 < n and 97 <= buf[i + 1] <= 122:
+            i += 1
+            while i < n and 97 <= buf[i] <= 122:
+                i += 1
+            while i < n and 48 <= buf[i] <= 57:
+                i += 1
+            if i < n and (buf[i] == 32 or 9 <= buf[i] <= 13):
+                i += 1
+            continue
+        if c != 123 and c != 125:
+            out[j] = c
+            j += 1
+        i += 1
+    return j
+
+# Text is laid out as many small paragraphs of about this size instead of one
+TEXT_CHUNK_CHARS = 4096
+
+# Maximum rows per table flowable when rendering spreadsheets
+TABLE_BATCH_ROWS = 1000
+
+# Table text is Courier at this size; every character is 0.6 of it wide
+TABLE_FONT_SIZE = 7
+
 # Supported file extensions mapped to conversion functions
 SUPPORTED_EXTENSIONS = {
     '.docx': 'convert_docx',
@@ -74,31 +212,58 @@ SUPPORTED_EXTENSIONS = {
     '.htm': 'convert_html',
     '.md': 'convert_markdown'
 }
+_EXT_SET = frozenset(SUPPORTED_EXTENSIONS)
+
+# Optional libraries used by each format (Markdown falls back to reportlab without weasyprint)
+FORMAT_DEPENDENCIES = {
+    '.docx': ('docx2pdf',),
+    '.doc': ('docx2pdf',),
+    '.pptx': ('pptx', 'reportlab'),
+    '.ppt': ('pptx', 'reportlab'),
+    '.xlsx': ('pandas', 'reportlab'),
+    '.xls': ('pandas', 'reportlab'),
+    '.txt': ('reportlab',),
+    '.csv': ('pandas', 'reportlab'),
+    '.rtf': ('reportlab',),
+    '.html': ('weasyprint',),
+    '.htm': ('weasyprint',),
+    '.md': ('weasyprint', 'markdown', 'reportlab')
+}
+
+def _safe_convert(method):
+    """Decorator for convert_* methods: log any failure with its traceback and return False"""
+    @functools.wraps(method)
+    def wrapper(self, input_file: Path, output_file: Path) -> bool:
+        try:
+            return method(self, input_file, output_file)
+        except Exception:
+            logger.exception(f"Failed to convert {input_file}")
+            return False
+    return wrapper
+
+def _shape_text(shape) -> str:
+    """Stripped text of a slide shape, or '' for shapes without a text frame"""
+    try:
+        return shape.text.strip()
+    except AttributeError:
+        return ''
 
 class DocumentConverter:
-    def __init__(self, overwrite: bool = False, keep_originals: bool = True):
+    def __init__(self, overwrite: bool = False, keep_originals: bool = True, workers: int = None):
         self.overwrite = overwrite
         self.keep_originals = keep_originals
+        self.workers = workers or os.cpu_count() or 1
         self.success_count = 0
         self.fail_count = 0
-        self.check_dependencies()
-    
-    def check_dependencies(self):
-        """Check which conversion libraries are available"""
-        missing_deps = []
-        
-        if not REPORTLAB_AVAILABLE:
-            missing_deps.append("reportlab (for text/CSV conversion)")
-        if not PANDAS_AVAILABLE:
-            missing_deps.append("pandas openpyxl (for Excel files)")
-        if not DOCX2PDF_AVAILABLE:
-            missing_deps.append("docx2pdf (for Word files)")
-        if not PPTX_AVAILABLE:
-            missing_deps.append("python-pptx (for PowerPoint files)")
-        if not WEASYPRINT_AVAILABLE:
-            missing_deps.append("weasyprint (for HTML conversion)")
-        if not MARKDOWN_AVAILABLE:
-            missing_deps.append("markdown (for Markdown files)")
+        self.skip_count = 0
+        # Resolve conversion methods once rather than per file
+        self._dispatch = {ext: getattr(self, name) for ext, name in SUPPORTED_EXTENSIONS.items()}
+    
+    def check_dependencies(self, extensions: Set[str]):
+        """Report libraries needed for the given formats that are not installed"""
+        needed = {dep for ext in extensions for dep in FORMAT_DEPENDENCIES.get(ext, ())}
+        missing_deps = [_DEP_DESCRIPTIONS[dep] for dep in _DEP_DESCRIPTIONS
+                        if dep in needed and not _installed(dep)]
         
         if missing_deps:
             logger.warning("Missing optional dependencies:")
@@ -106,323 +271,385 @@ class DocumentConverter:
                 logger.warning(f"  - {dep}")
             logger.warning("Install with: pip install -r requirements.txt")
     
+    @_safe_convert
     def convert_docx(self, input_file: Path, output_file: Path) -> bool:
         """Convert DOCX to PDF using docx2pdf"""
-        if not DOCX2PDF_AVAILABLE:
+        if not _need('docx2pdf'):
             logger.error("docx2pdf not available. Install with: pip install docx2pdf")
             return False
         
-        try:
-            docx_to_pdf(str(input_file), str(output_file))
-            return True
-        except Exception as e:
-            logger.error(f"Failed to convert {input_file}: {e}")
-            return False
+        docx_to_pdf(str(input_file), str(output_file))
+        return True
     
+    @_safe_convert
     def convert_doc(self, input_file: Path, output_file: Path) -> bool:
         """Convert DOC to PDF (requires LibreOffice or docx2pdf fallback)"""
         # docx2pdf can sometimes handle .doc files
-        if DOCX2PDF_AVAILABLE:
-            try:
-                docx_to_pdf(str(input_file), str(output_file))
-                return True
-            except Exception as e:
-                logger.error(f"Failed to convert {input_file}: {e}")
-                return False
+        if _need('docx2pdf'):
+            docx_to_pdf(str(input_file), str(output_file))
+            return True
         
         logger.error("No converter available for .doc files. Consider converting to .docx first.")
         return False
     
+    @_safe_convert
     def convert_pptx(self, input_file: Path, output_file: Path) -> bool:
         """Convert PPTX to PDF using python-pptx and reportlab"""
-        if not PPTX_AVAILABLE or not REPORTLAB_AVAILABLE:
+        if not _need('pptx') or not _need('reportlab'):
             logger.error("python-pptx and reportlab required for PowerPoint conversion")
             return False
         
-        try:
-            # Load presentation
-            prs = Presentation(str(input_file))
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(str(output_file), pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Add title
-            title = Paragraph(f"<b>{input_file.name}</b>", styles['Title'])
-            story.append(title)
-            story.append(Spacer(1, 12))
+        # Load presentation
+        prs = Presentation(str(input_file))
+        
+        # Create PDF document
+        doc = SimpleDocTemplate(str(output_file), pagesize=A4)
+        story = []
+        
+        # Add title
+        title = Paragraph(f"<b>{input_file.name}</b>", _TITLE_STYLE)
+        story.append(title)
+        story.append(Spacer(1, 12))
+        
+        # Process each slide
+        for i, slide in enumerate(prs.slides, 1):
+            # Add slide header
+            slide_header = Paragraph(f"<b>Slide {i}</b>", _H1_STYLE)
+            story.append(slide_header)
+            story.append(Spacer(1, 6))
             
-            # Process each slide
-            for i, slide in enumerate(prs.slides, 1):
-                # Add slide header
-                slide_header = Paragraph(f"<b>Slide {i}</b>", styles['Heading1'])
-                story.append(slide_header)
-                story.append(Spacer(1, 6))
-                
-                # Extract text from all shapes in the slide
-                slide_text = []
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text.strip():
-                        slide_text.append(shape.text.strip())
-                
-                if slide_text:
-                    # Join all text from the slide
-                    combined_text = '\n\n'.join(slide_text)
-                    # Add slide content
-                    content_para = Paragraph(combined_text.replace('\n', '<br/>'), styles['Normal'])
-                    story.append(content_para)
-                else:
-                    # No text content found
-                    no_text = Paragraph("<i>No text content found in this slide</i>", styles['Italic'])
-                    story.append(no_text)
-                
-                story.append(Spacer(1, 12))
+            # Extract text from all shapes in the slide
+            slide_text = [text for text in map(_shape_text, slide.shapes) if text]
             
-            # Build PDF
-            doc.build(story)
-            return True
+            if slide_text:
+                # Join all text from the slide
+                combined_text = '<br/><br/>'.join(text.replace('\n', '<br/>') for text in slide_text)
+                # Add slide content
+                content_para = Paragraph(combined_text, _NORMAL_STYLE)
+                story.append(content_para)
+            else:
+                # No text content found
+                no_text = Paragraph("<i>No text content found in this slide</i>", _ITALIC_STYLE)
+                story.append(no_text)
             
-        except Exception as e:
-            logger.error(f"Failed to convert {input_file}: {e}")
-            return False
+            story.append(Spacer(1, 12))
+        
+        # Build PDF
+        doc.build(story)
+        return True
     
     def convert_ppt(self, input_file: Path, output_file: Path) -> bool:
         """Convert PPT to PDF"""
         return self.convert_pptx(input_file, output_file)  # Try same method
     
+    @_safe_convert
     def convert_xlsx(self, input_file: Path, output_file: Path) -> bool:
         """Convert XLSX to PDF using pandas and reportlab"""
-        if not PANDAS_AVAILABLE or not REPORTLAB_AVAILABLE:
+        if not _need('pandas') or not _need('reportlab'):
             logger.error("pandas and reportlab required for Excel conversion")
             return False
         
-        try:
-            # Read Excel file
-            df = pd.read_excel(input_file, sheet_name=None)  # Read all sheets
-            
-            # Create PDF
-            doc = SimpleDocTemplate(str(output_file), pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Add title
-            title = Paragraph(f"<b>{input_file.name}</b>", styles['Title'])
-            story.append(title)
-            story.append(Spacer(1, 12))
-            
-            # Add each sheet
-            for sheet_name, sheet_df in df.items():
-                if len(df) > 1:  # Multiple sheets
-                    sheet_title = Paragraph(f"<b>Sheet: {sheet_name}</b>", styles['Heading1'])
+        # Create PDF
+        doc = SimpleDocTemplate(str(output_file), pagesize=A4)
+        story = []
+        
+        # Add title
+        title = Paragraph(f"<b>{input_file.name}</b>", _TITLE_STYLE)
+        story.append(title)
+        story.append(Spacer(1, 12))
+        
+        # Open the workbook once and parse one sheet at a time so only
+        # a single sheet's DataFrame is held in memory
+        with pd.ExcelFile(input_file) as xf:
+            multiple_sheets = len(xf.sheet_names) > 1
+            for sheet_name in xf.sheet_names:
+                if multiple_sheets:
+                    sheet_title = Paragraph(f"<b>Sheet: {sheet_name}</b>", _H1_STYLE)
                     story.append(sheet_title)
                     story.append(Spacer(1, 12))
                 
-                # Convert DataFrame to string representation
-                df_string = sheet_df.to_string(index=False)
-                para = Paragraph(f"<pre>{df_string}</pre>", styles['Code'])
-                story.append(para)
+                sheet_df = xf.parse(sheet_name)
+                story.extend(self.dataframe_tables(sheet_df, doc.width))
+                del sheet_df
                 story.append(Spacer(1, 12))
-            
-            doc.build(story)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to convert {input_file}: {e}")
-            return False
+        
+        doc.build(story)
+        return True
     
     def convert_xls(self, input_file: Path, output_file: Path) -> bool:
         """Convert XLS to PDF"""
         return self.convert_xlsx(input_file, output_file)
     
+    @_safe_convert
     def convert_text(self, input_file: Path, output_file: Path) -> bool:
         """Convert text file to PDF using reportlab"""
-        if not REPORTLAB_AVAILABLE:
+        if not _need('reportlab'):
             logger.error("reportlab required for text conversion")
             return False
         
-        try:
-            with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            doc = SimpleDocTemplate(str(output_file), pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Add title
-            title = Paragraph(f"<b>{input_file.name}</b>", styles['Title'])
-            story.append(title)
-            story.append(Spacer(1, 12))
-            
-            # Add content (preserve formatting with <pre> tag)
-            content_para = Paragraph(f"<pre>{content}</pre>", styles['Code'])
-            story.append(content_para)
-            
-            doc.build(story)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to convert {input_file}: {e}")
-            return False
+        doc = SimpleDocTemplate(str(output_file), pagesize=A4)
+        story = []
+        
+        # Add title
+        title = Paragraph(f"<b>{input_file.name}</b>", _TITLE_STYLE)
+        story.append(title)
+        story.append(Spacer(1, 12))
+        
+        # Add content (preserve formatting with <pre> tag)
+        with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
+            story.extend(self.text_paragraphs(f))
+        
+        doc.build(story)
+        return True
     
+    @_safe_convert
     def convert_csv(self, input_file: Path, output_file: Path) -> bool:
         """Convert CSV to PDF using pandas and reportlab"""
-        if not PANDAS_AVAILABLE or not REPORTLAB_AVAILABLE:
+        if not _need('pandas') or not _need('reportlab'):
             logger.error("pandas and reportlab required for CSV conversion")
             return False
         
+        # Read CSV; values are only rendered as text, so use the
+        # multithreaded pyarrow reader when available and otherwise
+        # skip dtype inference
         try:
-            # Read CSV
-            df = pd.read_csv(input_file)
-            
-            # Create PDF
-            doc = SimpleDocTemplate(str(output_file), pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Add title
-            title = Paragraph(f"<b>{input_file.name}</b>", styles['Title'])
-            story.append(title)
-            story.append(Spacer(1, 12))
-            
-            # Convert DataFrame to string
-            df_string = df.to_string(index=False)
-            para = Paragraph(f"<pre>{df_string}</pre>", styles['Code'])
-            story.append(para)
-            
-            doc.build(story)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to convert {input_file}: {e}")
-            return False
+            df = pd.read_csv(input_file, engine='pyarrow', dtype_backend='pyarrow')
+        except (ImportError, ValueError, TypeError):
+            df = pd.read_csv(input_file, dtype=str, low_memory=False)
+        
+        # Create PDF
+        doc = SimpleDocTemplate(str(output_file), pagesize=A4)
+        story = []
+        
+        # Add title
+        title = Paragraph(f"<b>{input_file.name}</b>", _TITLE_STYLE)
+        story.append(title)
+        story.append(Spacer(1, 12))
+        
+        story.extend(self.dataframe_tables(df, doc.width))
+        
+        doc.build(story)
+        return True
     
+    @_safe_convert
     def convert_rtf(self, input_file: Path, output_file: Path) -> bool:
         """Convert RTF to PDF (basic text extraction)"""
         # RTF is complex, but we can try to extract basic text
-        try:
+        # Basic RTF text extraction (very simple)
+        # Remove RTF control words line by line (this is very basic)
+        if input_file.stat().st_size > NUMBA_RTF_MIN_BYTES and _need('numba'):
+            # fromfile gives a writable array; the compiled signature rejects read-only buffers
+            data = np.fromfile(input_file, dtype=np.uint8)
+            out = np.empty_like(data)
+            n = _rtf_strip_nb(data, out)
+            text = out[:n].tobytes().decode('utf-8', 'ignore').strip()
+        else:
+            buf = io.StringIO()
             with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Basic RTF text extraction (very simple)
-            # Remove RTF control words (this is very basic)
-            import re
-            text = re.sub(r'\\[a-z]+\d*\s?', '', content)
-            text = re.sub(r'[{}]', '', text)
-            text = text.strip()
-            
-            return self.convert_text_content(text, input_file.name, output_file)
-            
-        except Exception as e:
-            logger.error(f"Failed to convert RTF {input_file}: {e}")
-            return False
+                for line in f:
+                    buf.write(_RTF_BRACE_RE.sub('', _RTF_CONTROL_RE.sub('', line)))
+            text = buf.getvalue().strip()
+        
+        return self.convert_text_content(text, input_file.name, output_file)
     
+    @_safe_convert
     def convert_html(self, input_file: Path, output_file: Path) -> bool:
         """Convert HTML to PDF using weasyprint"""
-        if not WEASYPRINT_AVAILABLE:
+        if not _need('weasyprint'):
             logger.error("weasyprint required for HTML conversion")
             return False
         
-        try:
-            HTML(filename=str(input_file)).write_pdf(str(output_file))
-            return True
-        except Exception as e:
-            logger.error(f"Failed to convert {input_file}: {e}")
-            return False
+        HTML(filename=str(input_file)).write_pdf(str(output_file), font_config=_WP_FONT_CONFIG)
+        return True
     
+    @_safe_convert
     def convert_markdown(self, input_file: Path, output_file: Path) -> bool:
         """Convert Markdown to PDF via HTML"""
-        if not MARKDOWN_AVAILABLE:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            md_content = f.read()
+        
+        if not _need('weasyprint'):
+            # Fallback to text conversion; the Markdown source reads fine as
+            # plain text, so skip rendering to HTML and stripping it again
+            return self.convert_text_content(md_content, input_file.name, output_file)
+        
+        if not _need('markdown'):
             logger.error("markdown required for Markdown conversion")
             return False
         
-        try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                md_content = f.read()
-            
-            # Convert to HTML
-            html_content = markdown.markdown(md_content)
-            
-            if WEASYPRINT_AVAILABLE:
-                # Use weasyprint for better formatting
-                HTML(string=html_content).write_pdf(str(output_file))
-            else:
-                # Fallback to text conversion
-                import re
-                text = re.sub(r'<[^>]+>', '', html_content)  # Strip HTML tags
-                return self.convert_text_content(text, input_file.name, output_file)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to convert {input_file}: {e}")
-            return False
+        # Convert to HTML and use weasyprint for better formatting
+        html_doc = _MD_HTML_TEMPLATE.format(body=markdown.markdown(md_content))
+        HTML(string=html_doc).write_pdf(str(output_file), stylesheets=[_MD_CSS],
+                                        font_config=_WP_FONT_CONFIG)
+        return True
     
     def convert_text_content(self, content: str, filename: str, output_file: Path) -> bool:
         """Helper to convert text content to PDF"""
-        if not REPORTLAB_AVAILABLE:
+        if not _need('reportlab'):
             return False
         
-        try:
-            doc = SimpleDocTemplate(str(output_file), pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            title = Paragraph(f"<b>{filename}</b>", styles['Title'])
-            story.append(title)
-            story.append(Spacer(1, 12))
-            
-            content_para = Paragraph(f"<pre>{content}</pre>", styles['Code'])
-            story.append(content_para)
-            
-            doc.build(story)
-            return True
-        except Exception as e:
-            logger.error(f"Failed to create PDF: {e}")
-            return False
+        doc = SimpleDocTemplate(str(output_file), pagesize=A4)
+        story = []
+        
+        title = Paragraph(f"<b>{filename}</b>", _TITLE_STYLE)
+        story.append(title)
+        story.append(Spacer(1, 12))
+        
+        story.extend(self.text_paragraphs(io.StringIO(content)))
+        
+        doc.build(story)
+        return True
+    
+    def text_paragraphs(self, stream) -> list:
+        """Helper to lay out text as escaped <pre> paragraphs, split on line boundaries where possible"""
+        paragraphs = []
+        
+        # Small paragraphs keep reportlab's layout cost linear, and escaping
+        # stops &, < and > in the text from being parsed as markup
+        while True:
+            chunk = stream.read(TEXT_CHUNK_CHARS)
+            if not chunk:
+                break
+            if not chunk.endswith('\n'):
+                # Finish the current line, but split lines longer than a chunk (minified files, logs)
+                chunk += stream.readline(TEXT_CHUNK_CHARS)
+            paragraphs.append(Paragraph(f"<pre>{_xml_escape(chunk)}</pre>", _CODE_STYLE))
+        
+        return paragraphs
+    
+    def dataframe_tables(self, df, width: float) -> list:
+        """Helper to lay out a DataFrame as table flowables of bounded size, fitted to the given width"""
+        if len(df.columns) == 0:
+            return [Paragraph("<i>No data</i>", _ITALIC_STYLE)]
+        
+        # Columns share the frame width and long cells wrap, so wide tables stay
+        # on the page; rows taller than a page are split between cells' lines
+        col_width = width / len(df.columns)
+        # Characters that fit on one line of a cell, inside its 6pt padding
+        fits = max(1, int((col_width - 12) / (0.6 * TABLE_FONT_SIZE)))
+        
+        def cell(value, style=_CELL_STYLE):
+            text = str(value)
+            # Plain strings are much cheaper to lay out than paragraphs
+            if len(text) <= fits and '\n' not in text:
+                return text
+            return Paragraph(_xml_escape(text), style)
+        
+        header = [cell(col, _HEADER_CELL_STYLE) for col in df.columns]
+        col_widths = [col_width] * len(header)
+        rows = df.itertuples(index=False, name=None)
+        tables = []
+        
+        while True:
+            batch = [[cell(value) for value in row] for row in islice(rows, TABLE_BATCH_ROWS)]
+            if not batch and tables:
+                break
+            tables.append(LongTable([header] + batch, colWidths=col_widths, repeatRows=1,
+                                    splitInRow=1, style=_TABLE_STYLE))
+            if len(batch) < TABLE_BATCH_ROWS:
+                break
+        
+        return tables
     
     def convert_document(self, input_file: Path, output_dir: Path) -> bool:
-        """Convert a single document to PDF"""
+        """Convert a single document to PDF (runs inside a worker process)"""
         ext = input_file.suffix.lower()
         
-        if ext not in SUPPORTED_EXTENSIONS:
+        method = self._dispatch.get(ext)
+        if method is None:
             logger.warning(f"Unsupported file format: {ext}")
             return False
         
         output_file = output_dir / f"{input_file.stem}.pdf"
         
-        # Check if output already exists
-        if output_file.exists() and not self.overwrite:
-            logger.info(f"Skipping {input_file.name} - PDF already exists")
-            return True
-        
-        # Get conversion method
-        method_name = SUPPORTED_EXTENSIONS[ext]
-        method = getattr(self, method_name)
-        
         logger.info(f"Converting: {input_file.name}")
         success = method(input_file, output_file)
         
         if success:
-            self.success_count += 1
-            # Remove original if requested
-            if not self.keep_originals:
-                try:
-                    input_file.unlink()
-                    logger.info(f"Removed original: {input_file.name}")
-                except Exception as e:
-                    logger.warning(f"Failed to remove original {input_file}: {e}")
-        else:
-            self.fail_count += 1
+            self.remove_original(input_file)
         
         return success
     
+    def convert_docx_batch(self, documents: List[Path], output_dir: Path) -> int:
+        """Convert several DOCX files in one docx2pdf session (runs inside a worker process).
+        
+        Returns the number of documents converted successfully.
+        """
+        # Spawned workers start with nothing imported
+        if not _need('docx2pdf'):
+            logger.error("docx2pdf not available. Install with: pip install docx2pdf")
+            return 0
+        
+        started = int(time.time())
+        
+        # docx2pdf converts a whole folder with a single Word instance, so
+        # stage the inputs together and convert them in one call
+        with tempfile.TemporaryDirectory() as staging_dir:
+            for doc in documents:
+                shutil.copy2(doc, Path(staging_dir) / doc.name)
+            
+            logger.info(f"Converting {len(documents)} Word documents in one batch")
+            try:
+                docx_to_pdf(staging_dir, str(output_dir))
+            except Exception:
+                logger.exception("Batch Word conversion failed, converting files individually")
+                return sum(self.convert_document(doc, output_dir) for doc in documents)
+        
+        succeeded = 0
+        for doc in documents:
+            output_file = output_dir / f"{doc.stem}.pdf"
+            try:
+                converted = os.stat(output_file).st_mtime >= started
+            except FileNotFoundError:
+                converted = False
+            
+            if converted:
+                succeeded += 1
+                self.remove_original(doc)
+            else:
+                logger.error(f"Failed to convert {doc}: no PDF produced")
+        
+        return succeeded
+    
+    def is_up_to_date(self, input_file: Path, output_file: Path) -> bool:
+        """Check whether an existing PDF is newer than its source (and may be reused)"""
+        if self.overwrite:
+            return False
+        try:
+            return os.stat(output_file).st_mtime >= os.stat(input_file).st_mtime
+        except FileNotFoundError:
+            return False
+    
+    def remove_original(self, input_file: Path):
+        """Remove a converted source document if requested"""
+        if self.keep_originals:
+            return
+        try:
+            input_file.unlink()
+            logger.info(f"Removed original: {input_file.name}")
+        except Exception as e:
+            logger.warning(f"Failed to remove original {input_file}: {e}")
+    
+    def select_docx_batch(self, documents: List[Path]) -> List[Path]:
+        """Pick the DOCX files worth converting together in one docx2pdf call"""
+        batch = {}
+        for doc in documents:
+            if doc.suffix.lower() == '.docx' and doc.name not in batch:
+                batch[doc.name] = doc
+        
+        # A single file gains nothing from batching
+        return list(batch.values()) if len(batch) > 1 else []
+    
     def find_documents(self, input_dir: Path) -> List[Path]:
         """Find all supported documents in directory (recursive)"""
         documents = []
         
-        for ext in SUPPORTED_EXTENSIONS.keys():
-            documents.extend(input_dir.rglob(f"*{ext}"))
+        # Single traversal; classify entries by extension instead of one rglob per format
+        for root, _, files in os.walk(input_dir):
+            for name in files:
+                dot = name.rfind('.')
+                if dot >= 0 and name[dot:].lower() in _EXT_SET:
+                    documents.append(Path(root) / name)
         
         return sorted(documents)
     
@@ -442,25 +669,71 @@ class DocumentConverter:
         
         logger.info(f"Found {len(documents)} documents to convert")
         
-        # Convert each document
+        # Skip up-to-date PDFs here, so an incremental run with nothing to do
+        # never starts the process pool
+        pending = []
         for doc in documents:
-            self.convert_document(doc, output_dir)
+            if self.is_up_to_date(doc, output_dir / f"{doc.stem}.pdf"):
+                logger.info(f"Skipping {doc.name} - PDF is up to date")
+                self.skip_count += 1
+            else:
+                pending.append(doc)
+        documents = pending
+        
+        if documents:
+            # Warn about missing libraries for the formats present; the workers import them
+            self.check_dependencies({doc.suffix.lower() for doc in documents})
+            self.convert_pending(documents, output_dir)
         
         # Summary
         logger.info(f"\nConversion completed:")
         logger.info(f"  Successfully converted: {self.success_count}")
+        logger.info(f"  Skipped (up to date): {self.skip_count}")
         logger.info(f"  Failed to convert: {self.fail_count}")
         logger.info(f"  Output directory: {output_dir}")
+    
+    def convert_pending(self, documents: List[Path], output_dir: Path):
+        """Convert documents whose PDFs are missing or stale, in parallel"""
+        # Word files that need converting are batched into one docx2pdf session
+        word_batch = self.select_docx_batch(documents)
+        if word_batch and not _installed('docx2pdf'):
+            word_batch = []
+        batched = set(word_batch)
+        singles = [doc for doc in documents if doc not in batched]
+        
+        # Convert documents in parallel; each conversion is independent.
+        # Use spawn since weasyprint/docx2pdf are not fork-safe on macOS.
+        workers = min(self.workers, len(singles) + (1 if word_batch else 0))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as executor:
+            futures = {executor.submit(self.convert_document, doc, output_dir): [doc] for doc in singles}
+            if word_batch:
+                futures[executor.submit(self.convert_docx_batch, word_batch, output_dir)] = word_batch
+            
+            done = 0
+            for future in as_completed(futures):
+                docs = futures[future]
+                try:
+                    succeeded = int(future.result())
+                except Exception as e:
+                    logger.error(f"Failed to convert {', '.join(doc.name for doc in docs)}: {e}")
+                    succeeded = 0
+                
+                self.success_count += succeeded
+                self.fail_count += len(docs) - succeeded
+                done += len(docs)
+                logger.info(f"Progress: {done}/{len(documents)} documents processed")
 
 def main():
     parser = argparse.ArgumentParser(description="Convert documents to PDF format")
     parser.add_argument("--input", required=True, help="Input directory containing documents")
     parser.add_argument("--output", required=True, help="Output directory for PDF files")
-    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing PDF files")
+    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing PDF files even if they are up to date")
     parser.add_argument("--keep-originals", action="store_true", default=True, 
                        help="Keep original files after conversion (default: True)")
     parser.add_argument("--remove-originals", action="store_true", 
                        help="Remove original files after successful conversion")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Number of parallel conversion processes (default: CPU count)")
     
     args = parser.parse_args()
     
@@ -479,7 +752,8 @@ def main():
     logger.info(f"OVERWRITE FLAG: {args.overwrite}")
     logger.info(f"KEEP ORIGINALS: {keep_originals}")
     
-    converter = DocumentConverter(overwrite=args.overwrite, keep_originals=keep_originals)
+    converter = DocumentConverter(overwrite=args.overwrite, keep_originals=keep_originals,
+                                  workers=args.workers)
     converter.convert_all(input_dir, output_dir)
 
 if __name__ == "__main__":
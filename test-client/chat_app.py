@@ -6,13 +6,73 @@ Supports both Ollama and OpenAI providers
 import asyncio
 import os
 import sys
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 import argparse
 from pathlib import Path
 
-from mcp_client import MCPClient
+from mcp_client import MCPClient, UNIX_SCHEME
 from llm_provider import LLMManager, ChatMessage
 
+# Document context is reused for repeated queries within this window
+CONTEXT_CACHE_SIZE = 32
+CONTEXT_CACHE_TTL = 300  # seconds
+
+# Only the most recent user/assistant exchanges are sent to the LLM
+MAX_CONVERSATION_TURNS = 10
+
+
+# Bytes read from stdin past the end of the last returned line
+_stdin_buffer = bytearray()
+
+
+def _read_stdin_line() -> str:
+    """Read one line straight from fd 0, raising EOFError at end of input"""
+    while b'\n' not in _stdin_buffer:
+        chunk = os.read(0, 4096)
+        if not chunk:
+            if _stdin_buffer:
+                break
+            raise EOFError
+        _stdin_buffer.extend(chunk)
+    newline = _stdin_buffer.find(b'\n')
+    end = newline + 1 if newline >= 0 else len(_stdin_buffer)
+    line = bytes(_stdin_buffer[:end])
+    del _stdin_buffer[:end]
+    return line.decode(errors='replace').rstrip('\r\n')
+
+
+async def read_line(prompt: str) -> str:
+    """Read a line from stdin without blocking the event loop.
+    
+    The read runs on a daemon thread so Ctrl+C can exit while it is blocked:
+    asyncio.run waits for default-executor threads, and a thread blocked in
+    input() holds sys.stdin's lock, which aborts interpreter shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def resolve(result: Optional[str], error: Optional[BaseException]):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def read():
+        try:
+            line = _read_stdin_line()
+        except Exception as e:  # EOFError when stdin is closed
+            loop.call_soon_threadsafe(resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(resolve, line, None)
+    
+    print(prompt, end="", flush=True)
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
 
 class DocumentChatApp:
     def __init__(self, server_path: str, db_path: str):
@@ -20,6 +80,7 @@ class DocumentChatApp:
         self.llm_manager = LLMManager()
         self.conversation: List[ChatMessage] = []
         self.running = True
+        self._context_cache: Dict[str, Tuple[float, Optional[str]]] = {}
         
     async def setup(self):
         """Initialize the app"""
@@ -167,23 +228,43 @@ class DocumentChatApp:
     
     async def _get_relevant_context(self, query: str) -> str:
         """Get relevant context from documents for the query"""
+        key = " ".join(query.lower().split())
+        now = time.monotonic()
+        cached = self._context_cache.get(key)
+        if cached and now - cached[0] < CONTEXT_CACHE_TTL:
+            return cached[1]
+        
         context_parts = []
+        failed = False
         
-        try:
-            # Search catalog first
-            catalog_result = await self.mcp_client.search_catalog(query)
-            if catalog_result and "Error:" not in catalog_result:
-                context_parts.append(f"📋 Document Catalog Results:\n{catalog_result}")
-            
-            # Search chunks for detailed information
-            chunks_result = await self.mcp_client.search_chunks(query)
-            if chunks_result and "Error:" not in chunks_result:
-                context_parts.append(f"📄 Document Chunks:\n{chunks_result}")
-                
-        except Exception as e:
-            context_parts.append(f"⚠️ Error retrieving context: {e}")
+        # Search the catalog and the chunks concurrently; they are independent
+        catalog_result, chunks_result = await asyncio.gather(
+            self.mcp_client.search_catalog(query),
+            self.mcp_client.search_chunks(query),
+            return_exceptions=True
+        )
+        
+        for label, result in (("📋 Document Catalog Results", catalog_result),
+                              ("📄 Document Chunks", chunks_result)):
+            if isinstance(result, Exception):
+                context_parts.append(f"⚠️ Error retrieving context: {result}")
+                failed = True
+            elif result and "Error:" in result:
+                # Server and tool errors come back as text; leave them out and don't cache
+                failed = True
+            elif result:
+                context_parts.append(f"{label}:\n{result}")
         
-        return "\n\n".join(context_parts) if context_parts else None
+        context = "\n\n".join(context_parts) if context_parts else None
+        
+        # Only cache successful lookups; evict the oldest entry when full
+        if not failed:
+            self._context_cache.pop(key, None)
+            if len(self._context_cache) >= CONTEXT_CACHE_SIZE:
+                self._context_cache.pop(next(iter(self._context_cache)))
+            self._context_cache[key] = (now, context)
+        
+        return context
     
     async def _handle_chat(self, user_input: str):
         """Handle chat messages"""
@@ -211,6 +292,11 @@ class DocumentChatApp:
             assistant_message = ChatMessage(role="assistant", content=response)
             self.conversation.append(assistant_message)
             
+            # Keep a sliding window so prompt size stays bounded
+            max_messages = 2 * MAX_CONVERSATION_TURNS
+            if len(self.conversation) > max_messages:
+                del self.conversation[:-max_messages]
+            
             print(f"\n🤖 {provider.get_name()}:")
             print(response)
             
@@ -227,31 +313,34 @@ class DocumentChatApp:
         print("Type your questions or use /help for commands")
         print("="*60)
         
-        while self.running:
-            try:
-                user_input = input("\n💭 You: ").strip()
-                
-                if not user_input:
-                    continue
-                
-                # Handle system commands
-                if await self._handle_command(user_input):
-                    continue
-                
-                # Handle chat
-                await self._handle_chat(user_input)
-                
-            except KeyboardInterrupt:
-                print("\n👋 Goodbye!")
-                break
-            except EOFError:
-                print("\n👋 Goodbye!")
-                break
-            except Exception as e:
-                print(f"❌ Unexpected error: {e}")
-        
-        # Cleanup
-        await self.cleanup()
+        try:
+            while self.running:
+                try:
+                    # Read input off the event loop so other tasks keep running
+                    user_input = (await read_line("\n💭 You: ")).strip()
+                    
+                    if not user_input:
+                        continue
+                    
+                    # Handle system commands
+                    if await self._handle_command(user_input):
+                        continue
+                    
+                    # Handle chat
+                    await self._handle_chat(user_input)
+                    
+                except EOFError:
+                    print("\n👋 Goodbye!")
+                    break
+                except Exception as e:
+                    print(f"❌ Unexpected error: {e}")
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # Ctrl+C cancels this task; clean up, then let asyncio.run finish shutting down
+            print("\n👋 Goodbye!")
+            raise
+        finally:
+            # Cleanup
+            await self.cleanup()
     
     async def cleanup(self):
         """Clean up resources"""
@@ -265,7 +354,7 @@ async def main():
     parser.add_argument(
         "--server-path", 
         default="../dist/index.js",
-        help="Path to the lance-mcp server script"
+        help="Path to the lance-mcp server script, or unix://<socket> of a running mcp_daemon.py"
     )
     parser.add_argument(
         "--db-path",
@@ -276,11 +365,15 @@ async def main():
     args = parser.parse_args()
     
     # Validate paths
-    server_path = Path(args.server_path).resolve()
-    if not server_path.exists():
-        print(f"❌ Server path not found: {server_path}")
-        print("Make sure you've built the lance-mcp server with 'npm run build'")
-        sys.exit(1)
+    if args.server_path.startswith(UNIX_SCHEME):
+        # Served by mcp_daemon.py
+        server_path = args.server_path
+    else:
+        server_path = Path(args.server_path).resolve()
+        if not server_path.exists():
+            print(f"❌ Server path not found: {server_path}")
+            print("Make sure you've built the lance-mcp server with 'npm run build'")
+            sys.exit(1)
     
     db_path = Path(args.db_path).resolve()
     if not db_path.exists():
@@ -293,4 +386,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
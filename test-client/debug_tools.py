@@ -3,42 +3,40 @@
 Debug script to test MCP tool calls directly
 """
 import asyncio
-from mcp_client import MCPClient
+from mcp_client import MCPClient, use_uvloop
+from mcp_daemon import server_address
+
+def preview(text: str, limit: int = 300) -> str:
+    """Truncate long tool output for display"""
+    return text[:limit] + "..." if len(text) > limit else text
 
 async def debug_tools():
     print("🔧 Testing MCP tool calls...")
     
-    client = MCPClient("../dist/index.js", "../my_doc_index")
+    # Attach to mcp_daemon.py when it is running to skip server startup
+    client = MCPClient(server_address("../dist/index.js"), "../my_doc_index")
     
     try:
         print("🔗 Connecting...")
         await asyncio.wait_for(client.connect(), timeout=10.0)
         print("✅ Connected!")
         
-        # Test simple catalog search first
-        print(f"\n📋 Testing catalog_search with 'healthcare':")
-        try:
-            result = await asyncio.wait_for(
-                client.call_tool("catalog_search", {"query": "healthcare"}), 
-                timeout=15.0
-            )
-            print(f"✅ Catalog result: {result[:300]}..." if len(result) > 300 else result)
-        except asyncio.TimeoutError:
-            print("❌ Catalog search timed out")
-        except Exception as e:
-            print(f"❌ Catalog error: {e}")
+        # Run both searches concurrently; they are independent
+        print(f"\n📋 Testing catalog_search with 'healthcare'")
+        print(f"📄 Testing all_chunks_search with 'MyUsage'")
+        results = await asyncio.gather(
+            asyncio.wait_for(client.call_tool("catalog_search", {"query": "healthcare"}), timeout=15.0),
+            asyncio.wait_for(client.call_tool("all_chunks_search", {"query": "MyUsage"}), timeout=15.0),
+            return_exceptions=True
+        )
         
-        print(f"\n📄 Testing all_chunks_search with 'MyUsage':")
-        try:
-            result = await asyncio.wait_for(
-                client.call_tool("all_chunks_search", {"query": "MyUsage"}), 
-                timeout=15.0
-            )
-            print(f"✅ Chunks result: {result[:300]}..." if len(result) > 300 else result)
-        except asyncio.TimeoutError:
-            print("❌ Chunks search timed out")
-        except Exception as e:
-            print(f"❌ Chunks error: {e}")
+        for label, result in zip(("Catalog", "Chunks"), results):
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"❌ {label} search timed out")
+            elif isinstance(result, Exception):
+                print(f"❌ {label} error: {result}")
+            else:
+                print(f"✅ {label} result: {preview(result)}")
             
     except asyncio.TimeoutError:
         print("❌ Connection timed out")
@@ -51,4 +49,5 @@ async def debug_tools():
             pass
 
 if __name__ == "__main__":
+    use_uvloop()
     asyncio.run(debug_tools())
\ No newline at end of file
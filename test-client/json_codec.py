@@ -0,0 +1,22 @@
+"""
+JSON encoding for MCP and LLM traffic, using orjson when it is installed
+"""
+try:
+    import orjson
+
+    JSONDecodeError = orjson.JSONDecodeError
+    loads = orjson.loads
+
+    def dumps(obj, sort_keys: bool = False) -> bytes:
+        """Serialize obj to compact JSON bytes"""
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+
+except ImportError:
+    import json
+
+    JSONDecodeError = json.JSONDecodeError
+    loads = json.loads
+
+    def dumps(obj, sort_keys: bool = False) -> bytes:
+        """Serialize obj to compact JSON bytes"""
+        return json.dumps(obj, sort_keys=sort_keys, separators=(',', ':'), ensure_ascii=False).encode()
@@ -3,151 +3,261 @@ LLM Provider abstraction supporting both Ollama and OpenAI
 """
 import asyncio
 import aiohttp
-import json
-from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Protocol
+from dataclasses import dataclass, field
 
+from json_codec import dumps, loads
 
-@dataclass
+try:
+    import httpx
+    import h2  # noqa: F401 -- required by httpx for HTTP/2
+except ImportError:  # OpenAI requests then go through the shared aiohttp session
+    httpx = None
+
+
+# System prompt wrapped around document search results. Kept byte-identical
+# across calls so providers can reuse their cached prompt prefix.
+SYSTEM_TEMPLATE = """You are a helpful assistant that can search and analyze documents. 
+You have access to document search tools that have provided this relevant information:
+
+{tools_context}
+
+Use this information to answer the user's question. Be specific and cite the information from the documents when relevant."""
+_SYSTEM_PREFIX, _SYSTEM_SUFFIX = SYSTEM_TEMPLATE.split("{tools_context}")
+
+
+# Request bodies are pre-encoded, so aiohttp can't set this itself
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Shared by every request; fail fast when the server is unreachable
+_TIMEOUT = aiohttp.ClientTimeout(total=60, sock_connect=5, sock_read=60)
+
+
+def build_system_prompt(tools_context: str) -> str:
+    """Fill the system prompt template with document search results"""
+    return _SYSTEM_PREFIX + tools_context + _SYSTEM_SUFFIX
+
+
+@dataclass(frozen=True)
 class ChatMessage:
     role: str  # "user", "assistant", "system"
     content: str
+    # Wire format shared by both providers, built once per message rather than per request
+    as_dict: Dict[str, str] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "as_dict", {"role": self.role, "content": self.content})
 
 
-class LLMProvider(ABC):
-    @abstractmethod
+class RateLimiter:
+    """Token bucket allowing `rpm` requests per minute, refilled continuously"""
+    
+    def __init__(self, rpm: int):
+        self.rate = rpm / 60.0
+        self.capacity = float(rpm)
+        self.tokens = float(rpm)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after_seconds(value: Optional[str], default: float = 1.0) -> float:
+    """Parse a Retry-After header given in seconds"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class LLMProvider(Protocol):
+    """Interface of a chat model, matched structurally"""
+    
+    def chat_stream(self, messages: List[ChatMessage], tools_context: Optional[str] = None) -> AsyncIterator[str]:
+        """Generate a chat response, yielding text as it arrives"""
+        ...
+    
     async def chat(self, messages: List[ChatMessage], tools_context: Optional[str] = None) -> str:
         """Generate a chat response"""
-        pass
+        ...
     
-    @abstractmethod
     def get_name(self) -> str:
         """Get provider name"""
-        pass
+        ...
 
 
-class OllamaProvider(LLMProvider):
-    def __init__(self, model: str = "llama3.2", base_url: str = "http://127.0.0.1:11434"):
-        self.model = model
-        self.base_url = base_url
-        self.session = None
-    
-    async def _ensure_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+class StreamingChatMixin:
+    """Implements chat() by collecting chat_stream()"""
     
     async def chat(self, messages: List[ChatMessage], tools_context: Optional[str] = None) -> str:
-        await self._ensure_session()
-        
-        # Convert messages to Ollama format
-        ollama_messages = []
-        
-        # Add system message with tools context if provided
-        if tools_context:
-            system_prompt = f"""You are a helpful assistant that can search and analyze documents. 
-You have access to document search tools that have provided this relevant information:
+        """Generate a chat response"""
+        return "".join([piece async for piece in self.chat_stream(messages, tools_context)])
 
-{tools_context}
 
-Use this information to answer the user's question. Be specific and cite the information from the documents when relevant."""
-            ollama_messages.append({"role": "system", "content": system_prompt})
-        
-        # Add conversation messages
-        for msg in messages:
-            ollama_messages.append({"role": msg.role, "content": msg.content})
+class OllamaProvider(StreamingChatMixin):
+    def __init__(self, model: str = "llama3.2", base_url: str = "http://127.0.0.1:11434", *,
+                 get_session: Callable[[], aiohttp.ClientSession], max_concurrency: int = 4):
+        self.model = model
+        self.base_url = base_url
+        # Returns the shared session, which has to be created inside the running event loop
+        self._get_session = get_session
+        # Avoid overloading the local Ollama server
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def chat_stream(self, messages: List[ChatMessage], tools_context: Optional[str] = None) -> AsyncIterator[str]:
+        # Add system message with tools context if provided, then the conversation
+        ollama_messages = [msg.as_dict for msg in messages]
+        if tools_context:
+            ollama_messages.insert(0, {"role": "system", "content": build_system_prompt(tools_context)})
         
         payload = {
             "model": self.model,
             "messages": ollama_messages,
-            "stream": False
+            "stream": True
         }
         
         try:
-            async with self.session.post(
+            async with self._semaphore, self._get_session().post(
                 f"{self.base_url}/api/chat",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=60)
+                data=dumps(payload),
+                headers=_JSON_HEADERS,
+                timeout=_TIMEOUT
             ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result.get("message", {}).get("content", "No response")
-                else:
-                    return f"Error: HTTP {response.status}"
+                if response.status != 200:
+                    yield f"Error: HTTP {response.status}"
+                    return
+                
+                # One JSON object per line, the last one marked done
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    chunk = loads(line)
+                    content = chunk.get("message", {}).get("content")
+                    if content:
+                        yield content
+                    if chunk.get("done"):
+                        break
         except Exception as e:
-            return f"Error connecting to Ollama: {e}"
+            yield f"Error connecting to Ollama: {e}"
     
     def get_name(self) -> str:
         return f"Ollama ({self.model})"
-    
-    async def close(self):
-        if self.session:
-            await self.session.close()
 
 
-class OpenAIProvider(LLMProvider):
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini", base_url: str = "https://api.openai.com/v1"):
+class OpenAIProvider(StreamingChatMixin):
+    def __init__(self, api_key: str, model: str = "gpt-4o-mini", base_url: str = "https://api.openai.com/v1", *,
+                 get_session: Callable[[], aiohttp.ClientSession], max_concurrency: int = 20, rpm: int = 500,
+                 max_retries: int = 3):
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
-        self.session = None
+        # Returns the shared session, which has to be created inside the running event loop
+        self._get_session = get_session
+        # Throttle proactively rather than running into 429 responses
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(rpm)
+        self.max_retries = max_retries
+        # Sent per request since the session is shared with other providers
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        # Multiplex concurrent requests over one HTTP/2 connection when httpx is installed
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=True,
+            headers=self.headers,
+            timeout=httpx.Timeout(60, connect=5),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        ) if httpx else None
     
-    async def _ensure_session(self):
-        if not self.session:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            self.session = aiohttp.ClientSession(headers=headers)
+    @asynccontextmanager
+    async def _post(self, body: bytes):
+        """POST a completion request, yielding its status, headers, text lines and a body reader"""
+        if self.client:
+            async with self.client.stream("POST", "/chat/completions", content=body) as response:
+                async def read_text() -> str:
+                    await response.aread()
+                    return response.text
+                yield response.status_code, response.headers, response.aiter_lines(), read_text
+        else:
+            async with self._get_session().post(
+                f"{self.base_url}/chat/completions",
+                data=body,
+                headers=self.headers,
+                timeout=_TIMEOUT
+            ) as response:
+                lines = (line.decode() async for line in response.content)
+                yield response.status, response.headers, lines, response.text
     
-    async def chat(self, messages: List[ChatMessage], tools_context: Optional[str] = None) -> str:
-        await self._ensure_session()
-        
-        # Convert messages to OpenAI format
-        openai_messages = []
-        
-        # Add system message with tools context if provided
+    async def chat_stream(self, messages: List[ChatMessage], tools_context: Optional[str] = None) -> AsyncIterator[str]:
+        # Add system message with tools context if provided, then the conversation
+        openai_messages = [msg.as_dict for msg in messages]
         if tools_context:
-            system_prompt = f"""You are a helpful assistant that can search and analyze documents. 
-You have access to document search tools that have provided this relevant information:
-
-{tools_context}
-
-Use this information to answer the user's question. Be specific and cite the information from the documents when relevant."""
-            openai_messages.append({"role": "system", "content": system_prompt})
-        
-        # Add conversation messages
-        for msg in messages:
-            openai_messages.append({"role": msg.role, "content": msg.content})
+            openai_messages.insert(0, {"role": "system", "content": build_system_prompt(tools_context)})
         
         payload = {
             "model": self.model,
             "messages": openai_messages,
             "temperature": 0.7,
-            "max_tokens": 2000
+            "max_tokens": 2000,
+            "stream": True
         }
+        if tools_context:
+            # Route requests with the same document context to the same prompt cache
+            payload["prompt_cache_key"] = hashlib.md5(tools_context.encode()).hexdigest()[:8]
         
+        body = dumps(payload)
         try:
-            async with self.session.post(
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=60)
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    error_text = await response.text()
-                    return f"Error: HTTP {response.status} - {error_text}"
+            for attempt in range(self.max_retries + 1):
+                await self._rate_limiter.acquire()
+                async with self._semaphore, self._post(body) as (status, headers, lines, read_text):
+                    if status == 200:
+                        # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+                        async for line in lines:
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            choices = loads(data).get("choices")
+                            if choices:
+                                content = choices[0].get("delta", {}).get("content")
+                                if content:
+                                    yield content
+                        return
+                    error_text = await read_text()
+                    retry_after = headers.get("Retry-After")
+                
+                if status != 429 or attempt == self.max_retries:
+                    yield f"Error: HTTP {status} - {error_text}"
+                    return
+                
+                # Rate limited: wait as long as the server asks, then retry
+                await asyncio.sleep(_retry_after_seconds(retry_after))
         except Exception as e:
-            return f"Error connecting to OpenAI: {e}"
+            yield f"Error connecting to OpenAI: {e}"
     
     def get_name(self) -> str:
         return f"OpenAI ({self.model})"
     
     async def close(self):
-        if self.session:
-            await self.session.close()
+        """Close the HTTP/2 client; the shared session is closed by LLMManager"""
+        if self.client:
+            await self.client.aclose()
 
 
 class LLMManager:
@@ -156,16 +266,27 @@ class LLMManager:
     def __init__(self):
         self.providers: Dict[str, LLMProvider] = {}
         self.current_provider: Optional[str] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the HTTP session shared by all providers, so connections are pooled and reused.
+        
+        Created on the first request, since aiohttp needs a running event loop.
+        """
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=100, limit_per_host=32, keepalive_timeout=75, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
     
     def add_ollama_provider(self, name: str, model: str = "llama3.2", base_url: str = "http://127.0.0.1:11434"):
         """Add an Ollama provider"""
-        self.providers[name] = OllamaProvider(model, base_url)
+        self.providers[name] = OllamaProvider(model, base_url, get_session=self._get_session)
         if not self.current_provider:
             self.current_provider = name
     
     def add_openai_provider(self, name: str, api_key: str, model: str = "gpt-4o-mini"):
         """Add an OpenAI provider"""
-        self.providers[name] = OpenAIProvider(api_key, model)
+        self.providers[name] = OpenAIProvider(api_key, model, get_session=self._get_session)
         if not self.current_provider:
             self.current_provider = name
     
@@ -188,6 +309,10 @@ class LLMManager:
     
     async def close_all(self):
         """Close all provider sessions"""
-        for provider in self.providers.values():
-            if hasattr(provider, 'close'):
-                await provider.close()
\ No newline at end of file
+        closes = [provider.close() for provider in self.providers.values() if hasattr(provider, 'close')]
+        if self._session:
+            closes.append(self._session.close())
+            self._session = None
+        
+        # Independent of each other, so close them concurrently
+        await asyncio.gather(*closes, return_exceptions=True)
\ No newline at end of file
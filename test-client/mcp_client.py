@@ -2,10 +2,98 @@
 MCP Client for connecting to the lance-mcp server
 """
 import asyncio
-import json
+import itertools
+import os
 import subprocess
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any, Optional, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field
+
+from json_codec import JSONDecodeError, dumps, loads
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import fastjsonschema
+except ImportError:  # Arguments are then only validated by the server
+    fastjsonschema = None
+
+if TYPE_CHECKING:
+    from semantic_cache import SemanticCache
+
+# Successful tool results are reused for identical calls within this window
+TOOL_CACHE_SIZE = 512
+TOOL_CACHE_TTL = 300  # seconds
+
+# server_path prefix selecting a running mcp_daemon.py socket instead of a new process
+UNIX_SCHEME = "unix://"
+
+INITIALIZE_PARAMS = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {}
+    },
+    "clientInfo": {
+        "name": "python-chat-client",
+        "version": "1.0.0"
+    }
+}
+
+# Large search results shouldn't stall the server on a full 64 KiB pipe
+PIPE_BUFFER_SIZE = 1 << 20
+# Linux-only fcntl command, missing from the fcntl module before Python 3.10
+F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+# Serialized tools/call request; only the id, tool name and arguments vary
+TOOL_CALL_TEMPLATE = b'{"jsonrpc":"2.0","id":%d,"method":"tools/call","params":{"name":%s,"arguments":%s}}\n'
+
+# How long to wait for a ping sent as a batch before assuming batches are unsupported
+BATCH_PROBE_TIMEOUT = 2.0  # seconds
+
+
+async def start_server_process(server_path: str, db_path: str, stderr=asyncio.subprocess.PIPE):
+    """Start the MCP server with its stdout on a pipe grown to PIPE_BUFFER_SIZE where supported"""
+    # The pipe is made here because uvloop gives subprocesses socket pairs,
+    # whose buffers can't be resized like a pipe's
+    read_fd, write_fd = os.pipe()
+    try:
+        if sys.platform.startswith('linux'):
+            try:
+                fcntl.fcntl(read_fd, F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
+            except OSError as e:
+                # Above the system's pipe-max-size
+                print(f"Could not enlarge the MCP server pipe: {e}")
+        process = await asyncio.create_subprocess_exec(
+            'node', server_path, db_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=write_fd,
+            stderr=stderr
+        )
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=PIPE_BUFFER_SIZE)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), open(read_fd, 'rb', buffering=0))
+    process.stdout = reader
+    return process
+
+
+def use_uvloop():
+    """Run asyncio on uvloop, whose pipe and socket transports are faster, when installed"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
 @dataclass
@@ -13,42 +101,52 @@ class MCPTool:
     name: str
     description: str
     input_schema: Dict[str, Any]
+    # Compiled from input_schema when fastjsonschema is installed
+    validator: Optional[Callable[[Dict[str, Any]], Any]] = field(default=None, repr=False, compare=False)
 
 
 class MCPClient:
-    def __init__(self, server_path: str, db_path: str):
+    def __init__(self, server_path: str, db_path: str, semantic_cache: Optional["SemanticCache"] = None,
+                 batch_requests: bool = False):
         self.server_path = server_path
         self.db_path = db_path
+        # Send call_tools() as JSON-RPC batches; off by default since the MCP SDK's
+        # stdio transport silently drops batches, and pipelined requests are as fast
+        self.batch_requests = batch_requests
+        # Optional embedding-based cache that also serves paraphrased queries
+        self.semantic_cache = semantic_cache
         self.process = None
-        self.available_tools: List[MCPTool] = []
+        # Streams to the server: the child's stdio, or a daemon's Unix socket
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self.available_tools: Dict[str, MCPTool] = {}
+        # Requests awaiting a response, keyed by JSON-RPC id
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        # (tool name, arguments) -> (timestamp, result), least recently used first
+        self._tool_cache: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+        # Tool calls currently being fetched, shared by identical concurrent calls
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        # Whether the server answers JSON-RPC batches; probed once, on first use
+        self._batch_probe: Optional[asyncio.Task] = None
         
     async def connect(self):
-        """Start the MCP server process and connect to it"""
+        """Start the MCP server process (or attach to a running daemon) and connect to it"""
         try:
-            # Start the MCP server process
-            self.process = await asyncio.create_subprocess_exec(
-                'node', self.server_path, self.db_path,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            if self.server_path.startswith(UNIX_SCHEME):
+                # Reuse the server kept alive by mcp_daemon.py
+                self._reader, self._writer = await asyncio.open_unix_connection(
+                    self.server_path[len(UNIX_SCHEME):]
+                )
+            else:
+                # Start the MCP server process
+                self.process = await start_server_process(self.server_path, self.db_path)
+                self._reader, self._writer = self.process.stdout, self.process.stdin
+            self._reader_task = asyncio.create_task(self._reader_loop())
             
             # Initialize the connection
-            await self._send_request({
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "tools": {}
-                    },
-                    "clientInfo": {
-                        "name": "python-chat-client",
-                        "version": "1.0.0"
-                    }
-                }
-            })
+            await self._send_request("initialize", INITIALIZE_PARAMS)
             
             # Get available tools
             await self._load_tools()
@@ -57,34 +155,94 @@ class MCPClient:
             print(f"Failed to connect to MCP server: {e}")
             raise
     
-    async def _send_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        """Send a request to the MCP server and get response"""
-        if not self.process:
+    async def _reader_loop(self):
+        """Read responses from the server and hand each one to the request awaiting its id"""
+        buffer = bytearray()
+        try:
+            while True:
+                chunk = await self._reader.read(PIPE_BUFFER_SIZE)
+                if not chunk:
+                    break
+                buffer += chunk
+                
+                # Messages are newline-delimited JSON
+                while True:
+                    newline = buffer.find(b'\n')
+                    if newline < 0:
+                        break
+                    line = bytes(buffer[:newline])
+                    del buffer[:newline + 1]
+                    if line.strip():
+                        self._dispatch_response(line)
+        finally:
+            # The server went away; fail anything still waiting for a response
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("No response from MCP server"))
+            self._pending.clear()
+    
+    def _dispatch_response(self, line: bytes):
+        """Resolve the pending request matching a response line"""
+        try:
+            response = loads(line)
+        except JSONDecodeError:
+            print(f"Failed to parse response: {line}")
+            return
+        
+        # A batch request is answered with an array of responses
+        for item in response if isinstance(response, list) else (response,):
+            # Notifications and server-initiated requests have no pending future
+            future = self._pending.pop(item.get("id"), None) if isinstance(item, dict) else None
+            if future and not future.done():
+                future.set_result(item)
+    
+    async def _send_request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a request to the MCP server and wait for its response"""
+        request_id = next(self._ids)
+        request = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            request["params"] = params
+        return await self._send_serialized(request_id, dumps(request) + b'\n')
+    
+    async def _send_serialized(self, request_id: int, data: bytes) -> Dict[str, Any]:
+        """Write an already serialized request and wait for the response with its id"""
+        return (await self._send_serialized_batch([request_id], data))[0]
+    
+    async def _send_serialized_batch(self, request_ids: List[int], data: bytes) -> List[Dict[str, Any]]:
+        """Write already serialized requests and wait for the responses with their ids"""
+        if not self._writer or not self._reader_task or self._reader_task.done():
             raise RuntimeError("MCP server not connected")
-            
-        request_json = json.dumps(request) + '\n'
-        self.process.stdin.write(request_json.encode())
-        await self.process.stdin.drain()
         
-        # Read response
-        response_line = await self.process.stdout.readline()
-        if not response_line:
-            raise RuntimeError("No response from MCP server")
-            
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in request_ids]
+        self._pending.update(zip(request_ids, futures))
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+            return list(await asyncio.gather(*futures))
+        finally:
+            for request_id in request_ids:
+                self._pending.pop(request_id, None)
+    
+    async def _supports_batches(self) -> bool:
+        """Check whether the server answers JSON-RPC batch requests (probed once, shared by concurrent callers)"""
+        if self._batch_probe is None:
+            self._batch_probe = asyncio.ensure_future(self._probe_batches())
+        return await asyncio.shield(self._batch_probe)
+    
+    async def _probe_batches(self) -> bool:
+        request_id = next(self._ids)
+        probe = b'[{"jsonrpc":"2.0","id":%d,"method":"ping"}]\n' % request_id
         try:
-            response = json.loads(response_line.decode().strip())
-            return response
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse response: {response_line}")
-            raise e
+            await asyncio.wait_for(self._send_serialized_batch([request_id], probe), BATCH_PROBE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            # Servers without batch support may not answer at all
+            return False
     
     async def _load_tools(self):
         """Load available tools from the MCP server"""
-        response = await self._send_request({
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/list"
-        })
+        response = await self._send_request("tools/list")
         
         if "result" in response and "tools" in response["result"]:
             for tool_data in response["result"]["tools"]:
@@ -93,32 +251,163 @@ class MCPClient:
                     description=tool_data["description"],
                     input_schema=tool_data["inputSchema"]
                 )
-                self.available_tools.append(tool)
+                if fastjsonschema:
+                    try:
+                        # Check only; filling in defaults would change the caller's arguments
+                        tool.validator = fastjsonschema.compile(tool.input_schema, use_default=False)
+                    except fastjsonschema.JsonSchemaDefinitionException:
+                        pass
+                self.available_tools[tool.name] = tool
+    
+    def _cached_result(self, tool_name: str, arguments: Dict[str, Any], key: bytes) -> Optional[str]:
+        """Return a cached result, or an error for arguments that fail the tool's schema"""
+        cached = self._tool_cache.get(key)
+        if cached and time.monotonic() - cached[0] < TOOL_CACHE_TTL:
+            self._tool_cache.move_to_end(key)
+            return cached[1]
+        
+        # Reject arguments that don't match the tool's schema without a round trip
+        tool = self.available_tools.get(tool_name)
+        if tool and tool.validator:
+            try:
+                tool.validator(arguments)
+            except fastjsonschema.JsonSchemaValueException as e:
+                return f"Error: Invalid arguments for {tool_name}: {e.message}"
+        return None
+    
+    def _tool_call_request(self, tool_name: str, key: bytes) -> Tuple[int, bytes]:
+        """Serialize a tools/call request, reusing the arguments encoded in the cache key"""
+        request_id = next(self._ids)
+        arguments_json = key[key.index(b'\0') + 1:]
+        return request_id, TOOL_CALL_TEMPLATE % (request_id, dumps(tool_name), arguments_json)
     
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
-        """Call a tool on the MCP server"""
-        response = await self._send_request({
-            "jsonrpc": "2.0",
-            "id": 3,
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": arguments
-            }
-        })
+        """Call a tool on the MCP server (successful results are cached)"""
+        # The key ends with the encoded arguments, reused for the request body
+        key = tool_name.encode() + b'\0' + dumps(arguments, sort_keys=True)
+        result = self._cached_result(tool_name, arguments, key)
+        if result is not None:
+            return result
+        
+        # Coalesce concurrent identical calls into a single server request
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_tool_result(tool_name, arguments, key))
+            self._track_inflight(key, task)
+        # Shielded so a cancelled caller doesn't cancel the others' request
+        return await asyncio.shield(task)
+    
+    def _track_inflight(self, key: bytes, future: asyncio.Future):
+        """Share a pending tool result with identical calls until it completes"""
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+    
+    async def _semantic_lookup(self, tool_name: str, arguments: Dict[str, Any]) -> Tuple[Optional[Tuple[str, Any]], Optional[str]]:
+        """Return the semantic cache key for a call and any cached result close enough to it"""
+        if not self.semantic_cache:
+            return None, None
+        query = self.semantic_cache.split_query(tool_name, arguments)
+        if not query:
+            return None, None
+        text, signature = query
+        try:
+            embedding = await self.semantic_cache.embed(text)
+        except Exception as e:
+            # The cache is optional; a failing embedder must not fail the tool call
+            print(f"Semantic cache embedding failed, calling {tool_name} directly: {e}")
+            return None, None
+        semantic_key = (signature, embedding)
+        return semantic_key, self.semantic_cache.lookup(*semantic_key)
+    
+    async def _fetch_tool_result(self, tool_name: str, arguments: Dict[str, Any], key: bytes) -> str:
+        """Call a tool on the MCP server and cache the result"""
+        semantic_key, hit = await self._semantic_lookup(tool_name, arguments)
+        if hit is not None:
+            return hit
+        
+        response = await self._send_serialized(*self._tool_call_request(tool_name, key))
+        return self._tool_result(key, response, semantic_key)
+    
+    async def call_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Call several tools, returning results in order.
+        
+        Calls are pipelined as separate requests, or sent as one JSON-RPC batch
+        when batch_requests is set and the server answers batches.
+        """
+        if not self.batch_requests or not await self._supports_batches():
+            return list(await asyncio.gather(*(self.call_tool(name, arguments) for name, arguments in calls)))
         
+        loop = asyncio.get_running_loop()
+        # Each entry is a result or a future shared with identical in-flight calls
+        results: List[Any] = []
+        # (cache key, semantic key, request id, serialized request, future) per call to send
+        batch = []
+        for tool_name, arguments in calls:
+            key = tool_name.encode() + b'\0' + dumps(arguments, sort_keys=True)
+            result = self._cached_result(tool_name, arguments, key)
+            if result is None:
+                result = self._inflight.get(key)
+            if result is None:
+                semantic_key, result = await self._semantic_lookup(tool_name, arguments)
+            if result is None:
+                result = loop.create_future()
+                self._track_inflight(key, result)
+                batch.append((key, semantic_key, *self._tool_call_request(tool_name, key), result))
+            results.append(result)
+        
+        if batch:
+            request_ids = [request_id for _, _, request_id, _, _ in batch]
+            data = b'[' + b','.join(request.rstrip(b'\n') for _, _, _, request, _ in batch) + b']\n'
+            try:
+                responses = await self._send_serialized_batch(request_ids, data)
+                for (key, semantic_key, _, _, future), response in zip(batch, responses):
+                    future.set_result(self._tool_result(key, response, semantic_key))
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                        # Reported by the raise below; identical calls still see it
+                        future.exception()
+                raise
+            finally:
+                # Cancelled: don't leave identical calls waiting forever
+                for *_, future in batch:
+                    future.cancel()
+        
+        return [await asyncio.shield(result) if isinstance(result, asyncio.Future) else result
+                for result in results]
+    
+    def _tool_result(self, key: bytes, response: Dict[str, Any], semantic_key: Optional[Tuple[str, Any]] = None) -> str:
+        """Extract the text of a tools/call response and cache it if successful"""
         if "result" in response:
-            if "content" in response["result"]:
+            result = response["result"]
+            text = str(result)
+            if "content" in result:
                 # Extract text content from the response
-                content = response["result"]["content"]
+                content = result["content"]
                 if isinstance(content, list) and len(content) > 0:
-                    return content[0].get("text", "")
-            return str(response["result"])
+                    text = content[0].get("text", "")
+            
+            # Don't cache tool-level errors
+            if not result.get("isError"):
+                self._tool_cache[key] = (time.monotonic(), text)
+                self._tool_cache.move_to_end(key)
+                if len(self._tool_cache) > TOOL_CACHE_SIZE:
+                    self._tool_cache.popitem(last=False)
+                if semantic_key:
+                    self.semantic_cache.put(*semantic_key, text)
+            return text
         elif "error" in response:
             return f"Error: {response['error']['message']}"
         else:
             return "No result returned"
     
+    def clear_cache(self):
+        """Drop all cached tool results"""
+        self._tool_cache.clear()
+        if self.semantic_cache:
+            self.semantic_cache.clear()
+    
     async def search_catalog(self, query: str) -> str:
         """Search the document catalog"""
         return await self.call_tool("catalog_search", {"text": query})
@@ -134,10 +423,21 @@ class MCPClient:
     
     def get_available_tools(self) -> List[MCPTool]:
         """Get list of available tools"""
-        return self.available_tools
+        return list(self.available_tools.values())
     
     async def close(self):
         """Close the MCP server connection"""
         if self.process:
             self.process.terminate()
-            await self.process.wait()
\ No newline at end of file
+            await self.process.wait()
+        elif self._writer:
+            # Leave the daemon's server running for the next client
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self._writer = None
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
\ No newline at end of file
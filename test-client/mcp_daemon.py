@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Daemon that keeps one lance-mcp server running and shares it over a Unix socket
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import signal
+import socket
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+from json_codec import JSONDecodeError, dumps, loads
+from mcp_client import PIPE_BUFFER_SIZE, start_server_process, use_uvloop
+
+# Default socket the daemon listens on and the test scripts look for
+DAEMON_SOCKET = "/tmp/lance-mcp.sock"
+
+# Client lines can carry large tool arguments
+CLIENT_LINE_LIMIT = 16 * 1024 * 1024
+
+
+def server_address(server_path: str, socket_path: str = DAEMON_SOCKET) -> str:
+    """Return the daemon's unix:// address if it is running, otherwise server_path"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            return server_path
+    return f"unix://{socket_path}"
+
+
+class MCPDaemon:
+    """Proxy JSON-RPC between Unix socket clients and a single MCP server process"""
+
+    def __init__(self, server_path: str, db_path: str, socket_path: str = DAEMON_SOCKET):
+        self.server_path = server_path
+        self.db_path = db_path
+        self.socket_path = socket_path
+        self.process = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        # Clients reuse ids, so requests are renumbered: daemon id -> (client, client id)
+        self._ids = itertools.count(1)
+        self._routes: Dict[int, Tuple[asyncio.StreamWriter, Any]] = {}
+        # The server is initialized once; later clients get the same result
+        self._initialize_result: Optional[Dict[str, Any]] = None
+        self._initialized = asyncio.Event()
+
+    async def start(self):
+        """Start and initialize the MCP server process, then listen for clients"""
+        # Server logs go to the daemon's terminal instead of filling a pipe
+        self.process = await start_server_process(self.server_path, self.db_path, stderr=None)
+        asyncio.create_task(self._server_loop())
+        # Clients are only accepted once there is a handshake result to give them
+        await self.initialize()
+
+        # Remove a socket left behind by a daemon that did not shut down cleanly
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path, limit=CLIENT_LINE_LIMIT
+        )
+
+    async def close(self):
+        """Stop accepting clients and shut the MCP server down"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+    def _write(self, writer: asyncio.StreamWriter, message: Dict[str, Any]):
+        writer.write(dumps(message) + b'\n')
+
+    async def _server_loop(self):
+        """Route each response from the MCP server back to the client that asked"""
+        buffer = bytearray()
+        while True:
+            chunk = await self.process.stdout.read(PIPE_BUFFER_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+
+            while True:
+                newline = buffer.find(b'\n')
+                if newline < 0:
+                    break
+                line = bytes(buffer[:newline])
+                del buffer[:newline + 1]
+                if not line.strip():
+                    continue
+                try:
+                    response = loads(line)
+                except JSONDecodeError:
+                    print(f"Failed to parse server output: {line}")
+                    continue
+
+                # Batch responses are split up and sent to each client on their own lines
+                for item in response if isinstance(response, list) else (response,):
+                    self._route_response(item)
+
+        print("❌ MCP server exited")
+        # Wake initialize() if the server died before answering it
+        self._initialized.set()
+        if self.server:
+            self.server.close()
+
+    def _route_response(self, response: Any):
+        """Send a response back to the client whose request it answers"""
+        route = self._routes.pop(response.get("id"), None) if isinstance(response, dict) else None
+        if route is None:
+            return
+        writer, client_id = route
+        if writer is None:
+            # The daemon's own initialize request
+            self._initialize_result = response.get("result")
+            self._initialized.set()
+        elif not writer.is_closing():
+            response["id"] = client_id
+            self._write(writer, response)
+    
+    async def initialize(self):
+        """Initialize the MCP server on behalf of all future clients"""
+        self._forward(None, {
+            "jsonrpc": "2.0",
+            "id": None,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}},
+                "clientInfo": {"name": "lance-mcp-daemon", "version": "1.0.0"}
+            }
+        })
+        await self.process.stdin.drain()
+        await self._initialized.wait()
+        if self._initialize_result is None:
+            raise RuntimeError("MCP server exited or failed to initialize")
+        self._forward(None, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        await self.process.stdin.drain()
+
+    def _renumber(self, writer: Optional[asyncio.StreamWriter], message: Any) -> Any:
+        """Give a request a daemon-unique id, remembering where its response goes"""
+        if isinstance(message, dict) and "id" in message:
+            daemon_id = next(self._ids)
+            self._routes[daemon_id] = (writer, message["id"])
+            message["id"] = daemon_id
+        return message
+    
+    def _forward(self, writer: Optional[asyncio.StreamWriter], message: Any):
+        """Send a client message or batch to the MCP server under daemon-unique ids"""
+        if isinstance(message, list):
+            message = [self._renumber(writer, item) for item in message]
+        else:
+            message = self._renumber(writer, message)
+        self.process.stdin.write(dumps(message) + b'\n')
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Relay one client's requests until it disconnects"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = loads(line)
+                except JSONDecodeError:
+                    print(f"Failed to parse client request: {line}")
+                    continue
+
+                method = message.get("method") if isinstance(message, dict) else None
+                if method == "initialize" and "id" in message:
+                    # Answer from the daemon's own handshake
+                    await self._initialized.wait()
+                    self._write(writer, {"jsonrpc": "2.0", "id": message["id"], "result": self._initialize_result})
+                    await writer.drain()
+                elif method == "notifications/initialized":
+                    continue
+                else:
+                    self._forward(writer, message)
+                    await self.process.stdin.drain()
+        except ConnectionError:
+            pass
+        finally:
+            # Drop routes for requests this client will never read
+            for daemon_id in [i for i, (w, _) in self._routes.items() if w is writer]:
+                del self._routes[daemon_id]
+            writer.close()
+
+
+async def serve(args):
+    daemon = MCPDaemon(args.server_path, args.db_path, args.socket)
+    # Shut down cleanly (removing the socket) when killed as well as on Ctrl+C
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        await daemon.start()
+        print(f"✅ lance-mcp daemon listening on {args.socket}")
+        print(f"   Connect with MCPClient(\"unix://{args.socket}\", ...)")
+        await daemon.server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await daemon.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep one lance-mcp server running for test clients")
+    parser.add_argument(
+        "--server-path",
+        default="../dist/index.js",
+        help="Path to the MCP server (default: ../dist/index.js)"
+    )
+    parser.add_argument(
+        "--db-path",
+        default="../my_doc_index",
+        help="Path to the LanceDB database (default: ../my_doc_index)"
+    )
+    parser.add_argument(
+        "--socket",
+        default=DAEMON_SOCKET,
+        help=f"Unix socket to listen on (default: {DAEMON_SOCKET})"
+    )
+    args = parser.parse_args()
+
+    use_uvloop()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Daemon stopped")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Semantic cache for MCP tool results, matching paraphrased queries by embedding similarity
+"""
+import inspect
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from mcp_client import TOOL_CACHE_TTL
+
+
+EmbedFn = Callable[[str], Union[Sequence[float], Awaitable[Sequence[float]]]]
+
+# Argument names holding the free-text query of a search tool
+QUERY_ARGUMENTS = ("query", "text")
+
+
+class SemanticCache:
+    """Serve tool results for queries whose embedding is close to a cached one"""
+
+    def __init__(self, embed_fn: EmbedFn, threshold: float = 0.92, max_entries: int = 1024,
+                 ttl: float = TOOL_CACHE_TTL):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # Results expire like the client's exact-match cache
+        self.ttl = ttl
+        # Unit-length embeddings, one row per entry, allocated on first insert
+        self._matrix: Optional[np.ndarray] = None
+        self._signatures: List[str] = []
+        self._results: List[str] = []
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._stored_at = np.zeros(max_entries, dtype=np.float64)
+        self._clock = 0
+
+    @staticmethod
+    def split_query(tool_name: str, arguments: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Split a call into its query text and a signature of everything else"""
+        for name in QUERY_ARGUMENTS:
+            if isinstance(arguments.get(name), str):
+                rest = {k: v for k, v in arguments.items() if k != name}
+                signature = f"{tool_name}\0{name}\0{json.dumps(rest, sort_keys=True, separators=(',', ':'))}"
+                return arguments[name], signature
+        return None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed text as a unit-length float32 vector"""
+        vector = self.embed_fn(text)
+        if inspect.isawaitable(vector):
+            vector = await vector
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, signature: str, embedding: np.ndarray) -> Optional[str]:
+        """Return the cached result most similar to the embedding, if close enough"""
+        count = len(self._results)
+        if not count:
+            return None
+
+        # Cosine similarity against every cached entry in one matrix product
+        similarities = self._matrix[:count] @ embedding
+        fresh = self._stored_at[:count] > time.monotonic() - self.ttl
+        for i in np.argsort(similarities)[::-1]:
+            if similarities[i] < self.threshold:
+                break
+            if fresh[i] and self._signatures[i] == signature:
+                self._touch(i)
+                return self._results[i]
+        return None
+
+    def put(self, signature: str, embedding: np.ndarray, result: str):
+        """Store a result, evicting an expired or else the least recently used entry when full"""
+        if self._matrix is None:
+            self._matrix = np.empty((self.max_entries, embedding.shape[0]), dtype=np.float32)
+
+        if len(self._results) < self.max_entries:
+            i = len(self._results)
+            self._signatures.append(signature)
+            self._results.append(result)
+        else:
+            expired = self._stored_at < time.monotonic() - self.ttl
+            i = int(np.argmin(np.where(expired, 0, self._last_used)))
+            self._signatures[i] = signature
+            self._results[i] = result
+
+        self._matrix[i] = embedding
+        self._stored_at[i] = time.monotonic()
+        self._touch(i)
+
+    def clear(self):
+        """Drop all cached entries"""
+        self._signatures.clear()
+        self._results.clear()
+        self._last_used[:] = 0
+
+    def _touch(self, i: int):
+        self._clock += 1
+        self._last_used[i] = self._clock
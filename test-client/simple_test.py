@@ -3,22 +3,19 @@
 Simple test to debug MCP communication
 """
 import asyncio
-import json
 import subprocess
 import sys
 
+from json_codec import JSONDecodeError, dumps, loads
+from mcp_client import TOOL_CALL_TEMPLATE, start_server_process, use_uvloop
+
 async def simple_test():
     print("🔧 Starting simple MCP test...")
     
     try:
         # Start the MCP server
         print("🚀 Starting MCP server...")
-        process = await asyncio.create_subprocess_exec(
-            'node', '../dist/index.js', '../my_doc_index',
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        process = await start_server_process('../dist/index.js', '../my_doc_index')
         
         print("📤 Sending initialize request...")
         
@@ -34,8 +31,7 @@ async def simple_test():
             }
         }
         
-        request_json = json.dumps(init_request) + '\n'
-        process.stdin.write(request_json.encode())
+        process.stdin.write(dumps(init_request) + b'\n')
         await process.stdin.drain()
         
         print("📥 Waiting for response...")
@@ -48,9 +44,9 @@ async def simple_test():
                 print(f"✅ Got response: {response_text}")
                 
                 try:
-                    response = json.loads(response_text)
+                    response = loads(response_line)
                     print(f"✅ Parsed response: {response}")
-                except json.JSONDecodeError as e:
+                except JSONDecodeError as e:
                     print(f"❌ JSON parse error: {e}")
             else:
                 print("❌ No response received")
@@ -65,8 +61,7 @@ async def simple_test():
             "method": "tools/list"
         }
         
-        request_json = json.dumps(tools_request) + '\n'
-        process.stdin.write(request_json.encode())
+        process.stdin.write(dumps(tools_request) + b'\n')
         await process.stdin.drain()
         
         print("📥 Waiting for tools response...")
@@ -80,18 +75,8 @@ async def simple_test():
         
         # Test a tool call
         print("📤 Sending catalog_search tool call...")
-        tool_request = {
-            "jsonrpc": "2.0",
-            "id": 3,
-            "method": "tools/call",
-            "params": {
-                "name": "catalog_search",
-                "arguments": {"text": "healthcare"}
-            }
-        }
-        
-        request_json = json.dumps(tool_request) + '\n'
-        process.stdin.write(request_json.encode())
+        tool_request = TOOL_CALL_TEMPLATE % (3, dumps("catalog_search"), dumps({"text": "healthcare"}))
+        process.stdin.write(tool_request)
         await process.stdin.drain()
         
         print("📥 Waiting for tool call response...")
@@ -119,4 +104,5 @@ async def simple_test():
         print(f"❌ Test failed: {e}")
 
 if __name__ == "__main__":
+    use_uvloop()
     asyncio.run(simple_test())
\ No newline at end of file
@@ -4,12 +4,15 @@ Test script to debug MCP connection and tool calls
 """
 import asyncio
 import json
-from mcp_client import MCPClient
+from mcp_client import MCPClient, use_uvloop
+from mcp_daemon import server_address
+from debug_tools import preview
 
 async def test_mcp():
     print("🔍 Testing MCP connection...")
     
-    client = MCPClient("../dist/index.js", "../my_doc_index")
+    # Attach to mcp_daemon.py when it is running to skip server startup
+    client = MCPClient(server_address("../dist/index.js"), "../my_doc_index")
     
     try:
         await client.connect()
@@ -22,21 +25,19 @@ async def test_mcp():
             print(f"  • {tool.name}: {tool.description}")
             print(f"    Schema: {tool.input_schema}")
         
-        # Test catalog search
-        print(f"\n🔍 Testing catalog_search...")
-        try:
-            result = await client.call_tool("catalog_search", {"query": "healthcare"})
-            print(f"Result: {result[:200]}..." if len(result) > 200 else f"Result: {result}")
-        except Exception as e:
-            print(f"❌ catalog_search error: {e}")
+        # Test catalog and chunks search concurrently
+        print(f"\n🔍 Testing catalog_search and all_chunks_search...")
+        results = await asyncio.gather(
+            client.call_tool("catalog_search", {"query": "healthcare"}),
+            client.call_tool("all_chunks_search", {"query": "MyUsage"}),
+            return_exceptions=True
+        )
         
-        # Test chunks search
-        print(f"\n🔍 Testing all_chunks_search...")
-        try:
-            result = await client.call_tool("all_chunks_search", {"query": "MyUsage"})
-            print(f"Result: {result[:200]}..." if len(result) > 200 else f"Result: {result}")
-        except Exception as e:
-            print(f"❌ all_chunks_search error: {e}")
+        for tool_name, result in zip(("catalog_search", "all_chunks_search"), results):
+            if isinstance(result, Exception):
+                print(f"❌ {tool_name} error: {result}")
+            else:
+                print(f"{tool_name} result: {preview(result, 200)}")
             
     except Exception as e:
         print(f"❌ Connection failed: {e}")
@@ -44,4 +45,5 @@ async def test_mcp():
         await client.close()
 
 if __name__ == "__main__":
+    use_uvloop()
     asyncio.run(test_mcp())
\ No newline at end of file